@@ -6,9 +6,23 @@ Created on Thu Jun 18 16:42:19 2020
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
 import math
 
+def free_matrix(distance):
+    return np.array([[1,distance],[0,1]])
+
+def lens_matrix(f):
+    return np.array([[1   ,0],[-1/f,1]])
+
+def mirror_matrix():
+    return np.array([[1,0],[0,-1]])
+
+def flat_matrix(n_1,n_2):
+    return np.array([[1,0],[0,n_1/n_2]])
+
+def curved_matrix(r,n_1,n_2):
+    return np.array([[1,0],[((n_1-n_2)/(r*n_2)),n_1/n_2]])
+
 class RayTracing:
 
     def __init__(self,x,y,theta):
@@ -56,6 +70,21 @@ class RayTracing:
     def T(self):
         return 1-self.R()
     
+    def free_matrix(self,distance):
+        return free_matrix(distance)
+    
+    def lens_matrix(self,f):
+        return lens_matrix(f)
+    
+    def mirror_matrix(self):
+        return mirror_matrix()
+    
+    def flat_matrix(self):
+        return flat_matrix(self.n_1,self.n_2)
+    
+    def curved_matrix(self,r):
+        return curved_matrix(r,self.n_1,self.n_2)
+    
     def hit_point(self,r):
         theta = self.slope2rad(self.state[-1][2])
         y = self.state[-1][1]
@@ -92,10 +121,10 @@ class RayTracing:
 #            ray_state_1 = np.append(self.state[-1][0]+distance,ray_state_1)
 #            # add intensity of beam
 #            ray_state_1 = np.append(ray_state_1,self.state[-1][3])
-            ray_state_1 = np.dot(np.array([[1,distance],[0,1]]),self.state[-1][1:3])
+            ray_state_1 = np.dot(self.free_matrix(distance),self.state[-1][1:3])
             ray_state_1 = np.append(self.state[-1][0]+distance,ray_state_1)
             ray_state_1 = np.append(ray_state_1,self.state[-1][3])
-            ray_state_2 = np.dot(np.array([[1,-distance],[0,1]]),self.state[-1][5:7])
+            ray_state_2 = np.dot(self.free_matrix(-distance),self.state[-1][5:7])
             ray_state_2 = np.append(self.state[-1][4]-distance,ray_state_2)
             ray_state_2 = np.append(ray_state_2,self.state[-1][-1])
             
@@ -106,7 +135,7 @@ class RayTracing:
 #            ray_state_1 = np.append(self.state[-1][0]+distance,ray_state_1)
 #            ray_state_1 = np.append(ray_state_1,self.state[-1][3])
             
-            ray_state_2 = np.dot(np.array([[1,-distance],[0,1]]),self.state[-1][5:7])
+            ray_state_2 = np.dot(self.free_matrix(-distance),self.state[-1][5:7])
             ray_state_2 = np.append(self.state[-1][4]-distance,ray_state_2)
             ray_state_2 = np.append(ray_state_2,self.state[-1][-1])
         
@@ -116,11 +145,11 @@ class RayTracing:
     
     def lens(self,f):
         self.M = False
-        ray_state_1 = np.dot(np.array([[1   ,0],[-1/f,1]]),self.state[-1][1:3])
+        ray_state_1 = np.dot(self.lens_matrix(f),self.state[-1][1:3])
         ray_state_1 = np.append(self.state[-1][0],ray_state_1)
         ray_state_1 = np.append(ray_state_1,self.state[-1][3])
         
-        ray_state_2 = np.dot(np.array([[1   ,0],[-1/f,1]]),self.state[-1][1:3])
+        ray_state_2 = np.dot(self.lens_matrix(f),self.state[-1][1:3])
         ray_state_2 = np.append(self.state[-1][0],ray_state_2)
         ray_state_2 = np.append(ray_state_2,self.state[-1][-1])
         ray_state = np.append(ray_state_1,ray_state_2)  
@@ -129,7 +158,7 @@ class RayTracing:
     
     def mirror(self):
         self.M = True
-        ray_state = np.dot(np.array([[1,0],[0,-1]]),self.state[-1][1:3])
+        ray_state = np.dot(self.mirror_matrix(),self.state[-1][1:3])
         ray_state = np.append(self.state[-1][0],ray_state)
         ray_state = np.append(ray_state,self.state[-1][3])
         ray_state = np.append(ray_state,ray_state)
@@ -138,7 +167,7 @@ class RayTracing:
     
     def full_reflection(self):
 #        self.M = True
-        ray_state = np.dot(np.array([[1,0],[0,-1]]),self.state[-1][1:3])
+        ray_state = np.dot(self.mirror_matrix(),self.state[-1][1:3])
         ray_state = np.append(self.state[-1][0],ray_state)
         ray_state = np.append(ray_state,self.state[-1][-1])
         return ray_state
@@ -146,7 +175,7 @@ class RayTracing:
     def flat_interface(self):
         self.M = False
         self.hit_point = False
-        ray_state_1 = np.dot(np.array([[1,0],[0,self.n_1/self.n_2]]),self.state[-1][1:3])
+        ray_state_1 = np.dot(self.flat_matrix(),self.state[-1][1:3])
         ray_state_1 = np.append(self.state[-1][0],ray_state_1)
         ray_state_1 = np.append(ray_state_1,self.state[-1][-1]*self.T())
     
@@ -160,7 +189,7 @@ class RayTracing:
     def curved_interface(self,r):
         self.M = False
         self.hit_point = True
-        ray_state_1 = np.dot(np.array([[1,0],[((self.n_1-self.n_2)/(r*self.n_2)),self.n_1/self.n_2]]),self.state[-1][1:3])
+        ray_state_1 = np.dot(self.curved_matrix(r),self.state[-1][1:3])
         ray_state_1 = np.append(self.state[-1][0],ray_state_1)
         ray_state_1 = np.append(ray_state_1,self.state[-1][-1]*self.T())
     
@@ -182,6 +211,142 @@ class RayTracing:
         return ray_state
        
 
+class GaussianBeam:
+
+    def __init__(self,x,w_0,wavelength):
+        '''
+        __init__ (self,x,w_0,wavelength)
+            Gives the initial state of a Gaussian beam with its waist at x.
+            Instead of tracing many weighted rays, the beam is described by
+            the complex beam parameter q, which is propagated through the same
+            ABCD matrices as RayTracing with q' = (A*q+B)/(C*q+D). The methods
+            for the optical equipments have the same names as in RayTracing.
+            
+        Parameters
+        ------------
+        self.x: float
+            x-position of the beam waist.
+        self.w_0: float
+            Radius of the beam waist.
+        self.wavelength: float
+            Vacuum wavelength, in the same unit as the positions.
+        self.n_1, self.n_2: float
+            Refractive indices in front of and behind the interfaces.
+        self.n: float
+            Refractive index of the medium the beam is currently in.
+        self.state: list
+            Each state is a tuple (x, q, n) of the beam after an optical
+            equipment, x and n are real and q is complex.
+        '''
+        self.x = x
+        self.w_0 = w_0
+        self.wavelength = wavelength
+        self.state = []
+        self.n_1 = 1
+        self.n_2 = 1.5
+        self.n = self.n_1
+        
+    def ray(self):
+        '''
+        ray(self)
+            Append the initial beam state, the waist at x, into the total state.
+        '''
+        q = 1j*math.pi*self.w_0**2*self.n/self.wavelength
+        self.state.append((self.x,q,self.n))
+        
+    def transform(self,matrix,distance=0):
+        '''
+        transform(self,matrix,distance)
+            Apply an ABCD matrix to the q parameter of the last state and
+            append the new state.
+            
+        Parameters
+        ------------
+        matrix: array
+            The 2x2 ABCD matrix of the optical equipment.
+        distance: float
+            How far the equipment moves the beam along x.
+        '''
+        (A,B),(C,D) = matrix
+        q = self.state[-1][1]
+        q = (A*q+B)/(C*q+D)
+        beam_state = (self.state[-1][0]+distance,q,self.n)
+        self.state.append(beam_state)
+        return beam_state
+        
+    def free_propagate(self,distance):
+        return self.transform(free_matrix(distance),distance)
+    
+    def lens(self,f):
+        return self.transform(lens_matrix(f))
+    
+    def mirror(self):
+        '''
+        mirror(self)
+            A plane mirror only turns the beam around, q is unchanged.
+            The beam is traced unfolded, x keeps counting the path length.
+        '''
+        beam_state = self.state[-1]
+        self.state.append(beam_state)
+        return beam_state
+    
+    def flat_interface(self):
+        self.n = self.n_2
+        return self.transform(flat_matrix(self.n_1,self.n_2))
+    
+    def curved_interface(self,r):
+        self.n = self.n_2
+        return self.transform(curved_matrix(r,self.n_1,self.n_2))
+    
+    def beam_radius(self,q=None,n=None):
+        '''
+        beam_radius(self,q,n)
+            Radius of the beam, where the intensity drops to 1/e^2.
+            The last state is used if q and n are not given.
+        '''
+        if q is None:
+            q,n = self.state[-1][1],self.state[-1][2]
+        return np.sqrt(-self.wavelength/(math.pi*n*np.imag(1/q)))
+    
+    def curvature(self):
+        '''
+        curvature(self)
+            Radius of curvature of the wavefront of the last state,
+            inf at the waist.
+        '''
+        inverse = np.real(1/self.state[-1][1])
+        if inverse == 0:
+            return np.inf
+        return 1/inverse
+    
+    def waist(self):
+        '''
+        waist(self)
+            Returns the x-position and radius of the waist of the last state.
+        '''
+        x,q,n = self.state[-1]
+        position = x - q.real
+        return position,np.sqrt(self.wavelength*q.imag/(math.pi*n))
+    
+    def beam_size(self,distance,points=50):
+        '''
+        beam_size(self,distance,points)
+            Beam radius along the axis over a free propagation of distance
+            from the last state, without changing the state.
+            
+        Parameters
+        ------------
+        distance: float
+            Length of the free propagation.
+        points: int
+            Number of positions the beam radius is evaluated at.
+        '''
+        z = np.linspace(0,distance,points)
+        q = self.state[-1][1] + z
+        x = self.state[-1][0] + z
+        return x,self.beam_radius(q,self.state[-1][2])
+       
+
 if __name__=='__main__':
     
     def bundle(rays):
@@ -208,6 +373,7 @@ if __name__=='__main__':
         plot_ray(self)
             Plot the ray path which is described in self.state.
         '''
+        import matplotlib.pyplot as plt
         Ray_thickness = 4
         for j in range(len(rays)):
             for i in range(len(rays[j])-1):            
@@ -225,6 +391,7 @@ if __name__=='__main__':
         plt.show()
     
     def make_table(n):
+        import pandas as pd
         for i in range(n):            
             data = bundle(n)[i]
             df = pd.DataFrame(data,columns=list('ABCDEFGH'))
@@ -2,7 +2,8 @@
 """
 Created on Thu Jun 11 09:23:07 2020
 
-This file needs three packages:numpy, matplotlib.pyplt, math.
+This file needs numpy and math for the tracing, matplotlib.pyplot is only
+imported when plot_ray is called.
 
 This .py file simulate the behavior of the prism. The geometry of the prism is equilateral triangle.
 To trace the ray, we use the state of ray to describe. To trace the ray while refracted by the
@@ -15,7 +16,6 @@ if the incident angle is smaller  than -2 degree, the outcoming ray will disappe
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
 import math
 
 class PrismTracing:
@@ -105,6 +105,7 @@ class PrismTracing:
         plot_ray(self)
             Plot the prism and the ray path which is described in self.state.
         '''
+        import matplotlib.pyplot as plt
         # plot the prism
         x1 = np.linspace(-self.side_length/2+self.central_point,0+self.central_point)
         y1 = math.sqrt(3)*(x1-self.central_point)+ 2/math.sqrt(3)*self.side_length/2
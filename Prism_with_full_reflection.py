@@ -13,7 +13,6 @@ Created on Thu Jun 11 09:23:07 2020
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
 import math
 
 class PrismTracing:
@@ -72,6 +71,7 @@ class PrismTracing:
             self.state.append(ray_state)
     
     def plot_ray(self):
+        import matplotlib.pyplot as plt
         # plot the prism
         x1 = np.linspace(-self.side_length/2+self.central_point,0+self.central_point)
         y1 = math.sqrt(3)*(x1-self.central_point)+ 2/math.sqrt(3)*self.side_length/2
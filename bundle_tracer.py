@@ -0,0 +1,631 @@
+# -*- coding: utf-8 -*-
+"""
+This .py file traces a whole bundle of rays at once. BundleTracing behaves like
+RayTracing in ABCD_ray_tracer.py, but every entry of self.state is an array of
+shape (8, number of rays): each row is one of the 8 elements of the ray state
+of RayTracing, so a row holds that element for all rays. The ABCD matrices are
+applied to all rays with a single np.dot. With polarized = True four more rows
+carry the s and p intensities through the interfaces. With tolerance set, the
+reflectances are looked up in a FresnelTable, made once per pair of refractive
+indices and shared by all bundles of the process.
+
+PrismBundleTracing does the same for PrismTracing in Prism_RayTracing.py, and
+PositionBundleTracing for RayTracing in mirror and convex.py.
+
+BundleTracing.multi_surface passes the bundle through a train of surfaces
+and keeps only the state behind it. It traces the surfaces one by one, as
+curved_interface shifts the hit points, so it is not faster than the chain.
+
+OpticalTrain keeps the state of the bundle after every optical equipment, so
+that changing one equipment only retraces the bundle from that equipment on.
+
+This file only needs numpy.
+"""
+
+import numpy as np
+import math
+from functools import lru_cache
+from ABCD_ray_tracer import RayTracing
+from Prism_RayTracing import PrismTracing
+
+def fresnel(n_1,n_2,theta_i):
+    '''
+    fresnel(n_1,n_2,theta_i)
+        Returns the reflectance (R_s, R_p) of the s and p polarization for
+        rays going from index n_1 into n_2 with the incident angle theta_i
+        (in rad, float or array). Total reflection gives 1.
+    '''
+    T_s,T_p = transmittance(n_1,n_2,np.cos(theta_i),n_1/n_2*np.sin(theta_i))
+    return 1-T_s,1-T_p
+
+def transmittance(n_1,n_2,cos_i,sin_t):
+    '''
+    transmittance(n_1,n_2,cos_i,sin_t)
+        Returns the transmittance (1-R_s, 1-R_p) of fresnel() for the cosine
+        of the incident angle and the sine of the refraction angle, when the
+        caller has them already. Under total reflection cos_t is 0 and both
+        come out as 0.
+    '''
+    with np.errstate(divide='ignore',invalid='ignore'):
+        ratio = np.sqrt(np.maximum(1-sin_t**2,0))/cos_i
+        m = n_2/n_1*ratio
+        T_s = 4*m/(1+m)**2
+        m = n_1/n_2*ratio
+        T_p = 4*m/(1+m)**2
+    return T_s,T_p
+
+def gaussian(position):
+    '''
+    gaussian(position)
+        The gaussian intensity profile of RayTracing.gaussian for arrays.
+    '''
+    return 1/(np.sqrt(2*np.pi)) * np.exp(-position**2/2)
+
+TOLERANCE = 1e-6
+
+class FresnelTable:
+
+    names = ('R_s','R_p','R')
+
+    def __init__(self,n_1,n_2,tolerance=TOLERANCE,max_points=2**16+1):
+        '''
+        __init__ (self,n_1,n_2,tolerance,max_points)
+            Tabulate the reflectance for rays going from index n_1 into n_2
+            against the incident angle from 0 to pi/2,
+            so they can be looked up with linear interpolation instead of
+            evaluating the trigonometric functions for every ray.
+            The grid is refined until the interpolation error, checked inside
+            every interval, is below tolerance. The intervals where it is not
+            (next to the critical angle of total reflection) are evaluated
+            exactly, so the error of lookup is always below tolerance.
+            Use fresnel_lookup to share one table per process.
+            
+        Parameters
+        ------------
+        tolerance: float
+            Largest error of the reflectance.
+        self.grid: array
+            The incident angles of the table.
+        self.table: dict
+            The values of 'R_s', 'R_p' and 'R' (the reflectance of
+            RayTracing.R) on the grid.
+        self.exact_interval: array
+            True for the intervals of the grid which are evaluated exactly.
+        self.slope: dict
+            Difference of the values between neighbouring grid points.
+        '''
+        self.n_1 = n_1
+        self.n_2 = n_2
+        self.tolerance = tolerance
+        points = 257
+        while True:
+            self.grid = np.linspace(0,np.pi/2,points)
+            self.table = {name:self.exact(name,self.grid) for name in self.names}
+            error = np.zeros(points-1)
+            for fraction in (0.25,0.5,0.75):
+                theta_i = self.grid[:-1]+fraction*(self.grid[1]-self.grid[0])
+                for name,values in self.table.items():
+                    interpolated = values[:-1]+(values[1:]-values[:-1])*fraction
+                    expected = self.exact(name,theta_i)
+                    with np.errstate(invalid='ignore'):
+                        difference = np.where(np.isnan(interpolated) & np.isnan(expected),0,abs(interpolated-expected))
+                    error = np.fmax(error,np.where(np.isnan(difference),np.inf,difference))
+            self.exact_interval = error > tolerance
+            if np.mean(self.exact_interval) <= 0.01 or points >= max_points:
+                break
+            points = 2*points-1
+        self.step = 1/(self.grid[1]-self.grid[0])
+        self.slope = {name:np.diff(values) for name,values in self.table.items()}
+    
+    def exact(self,name,theta_i):
+        '''
+        exact(self,name,theta_i)
+            Evaluate name at the incident angle theta_i without the table.
+        '''
+        with np.errstate(invalid='ignore'):
+            if name == 'R':
+                theta_t = np.sqrt(1-(self.n_1/self.n_2 * np.sin(theta_i))**2)
+                return (abs((self.n_1*np.cos(theta_t)-self.n_2*np.cos(theta_i))/(self.n_1*np.cos(theta_t)+self.n_2*np.cos(theta_i))))**2
+        return fresnel(self.n_1,self.n_2,theta_i)[self.names.index(name)]
+    
+    def lookup(self,theta_i,*names):
+        '''
+        lookup(self,theta_i,*names)
+            Returns a list with the values of names at the incident angles
+            theta_i (in rad, float or array). The table is shared by all
+            values, so looking several up at once is cheaper.
+        '''
+        theta_i = np.asarray(theta_i,dtype=float)
+        angle = abs(theta_i)
+        with np.errstate(invalid='ignore'):
+            position = angle*self.step
+            outside = ~(position < len(self.grid)-1)
+        index = np.where(outside,0,position).astype(np.intp)
+        weight = position-index
+        exact = outside | self.exact_interval[index]
+        result = []
+        for name in names:
+            value = self.table[name][index]+self.slope[name][index]*weight
+            if np.any(exact):
+                value = np.where(exact,np.nan,value)
+                value[exact] = self.exact(name,theta_i[exact])
+            result.append(value)
+        return result
+
+@lru_cache(maxsize=None)
+def fresnel_lookup(n_1,n_2,tolerance=TOLERANCE):
+    '''
+    fresnel_lookup(n_1,n_2,tolerance)
+        The FresnelTable of (n_1, n_2), made once and then shared by all
+        bundles of the process.
+    '''
+    return FresnelTable(n_1,n_2,tolerance)
+
+class BundleTracing(RayTracing):
+
+    def __init__(self,x,y,theta):
+        '''
+        __init__ (self,x,y,theta)
+            Gives the initial state of all rays in the bundle.
+            
+        Parameters
+        ------------
+        self.x: float or array
+            Initial x-position of the rays.
+        self.y: float or array
+            Initial y-position of the rays.
+        self.theta: float or array
+            The angle between the horizontal and the ray path.
+        self.state: list
+            Every state is an array of shape (8, number of rays), or
+            (12, number of rays) if self.polarized is True.
+        self.polarized: bool
+            If True, rows 8 and 9 of the state are the s and p intensity of
+            the refracted ray, rows 10 and 11 those of the reflected ray.
+            They are split with the Fresnel equations of fresnel(), while the
+            intensities in rows 3 and 7 stay those of R() and T(), the same
+            as without polarization. The sum of the s and p rows therefore
+            differs from rows 3 and 7 (at normal incidence into n = 1.5 the
+            transmission is 0.96 in rows 8 and 9, 0.78 in row 3).
+        self.s_fraction: float
+            Part of the initial intensity which is s polarized.
+        self.tolerance: float
+            If not None, the reflectances are looked up in the shared
+            FresnelTable with this accuracy instead of being computed.
+        '''
+        x,y,theta = np.broadcast_arrays(*np.atleast_1d(x,y,theta))
+        RayTracing.__init__(self,x.astype(float),y.astype(float),theta.astype(float))
+        self.polarized = False
+        self.s_fraction = 0.5
+        self.tolerance = None
+        
+    def gaussian(self,position):
+        return gaussian(position)
+    
+    def reflectance(self,theta_i):
+        '''
+        reflectance(self,theta_i)
+            Returns (R_s, R_p) at the incident angle theta_i (in rad).
+        '''
+        if self.tolerance is None:
+            return fresnel(self.n_1,self.n_2,theta_i)
+        return fresnel_lookup(self.n_1,self.n_2,self.tolerance).lookup(theta_i,'R_s','R_p')
+    
+    def R(self):
+        if self.tolerance is None:
+            return RayTracing.R(self)
+        theta_i = self.slope2rad(self.state[-1][2])
+        return fresnel_lookup(self.n_1,self.n_2,self.tolerance).lookup(theta_i,'R')[0]
+    
+    def ray(self):
+        '''
+        ray(self)
+            Append the initial state of the bundle into the total ray state.
+        '''
+        if self.Gauss == True:
+            intensity = self.gaussian(self.y)
+        else:
+            intensity = np.ones_like(self.y)
+        ray_state = np.vstack([self.x,self.y,self.theta,intensity,self.x,self.y,self.theta,intensity])
+        if self.polarized == True:
+            s = self.s_fraction*intensity
+            p = (1-self.s_fraction)*intensity
+            ray_state = np.vstack([ray_state,s,p,s,p])
+        self.state.append(ray_state)
+        
+    def free_propagate(self,distance):
+        last = self.state[-1]
+        ray_state_2 = np.vstack([last[4]-distance,np.dot(self.free_matrix(-distance),last[5:7]),last[7]])
+        if self.M == False:
+            ray_state_1 = np.vstack([last[0]+distance,np.dot(self.free_matrix(distance),last[1:3]),last[3]])
+            polarization = last[8:12]
+        else:
+            ray_state_1 = ray_state_2
+            polarization = np.vstack([last[8:10],last[8:10]])
+        ray_state = np.vstack([ray_state_1,ray_state_2,polarization])
+        self.state.append(ray_state)
+        return ray_state
+    
+    def lens(self,f):
+        self.M = False
+        last = self.state[-1]
+        refracted = np.dot(self.lens_matrix(f),last[1:3])
+        ray_state = np.vstack([last[0],refracted,last[3],last[0],refracted,last[7],last[8:12]])
+        self.state.append(ray_state)
+        return ray_state
+    
+    def mirror(self):
+        self.M = True
+        last = self.state[-1]
+        ray_state = np.vstack([last[0],np.dot(self.mirror_matrix(),last[1:3]),last[3]])
+        ray_state = np.vstack([ray_state,ray_state,last[8:10],last[8:10]])
+        self.state.append(ray_state)
+        return ray_state
+    
+    def full_reflection(self):
+        last = self.state[-1]
+        return np.vstack([last[0],np.dot(self.mirror_matrix(),last[1:3]),last[7]])
+    
+    def interface(self,matrix):
+        '''
+        interface(self,matrix)
+            Refract the bundle with matrix and split it into the refracted and
+            the reflected ray. With self.polarized the s and p intensities of
+            the refracted ray of the last state are split with R_s and R_p as
+            well. Unlike the intensity in row 7 of RayTracing, they do not
+            start from the reflected ray of the last state.
+        '''
+        self.M = False
+        last = self.state[-1]
+        ray_state_1 = np.vstack([last[0],np.dot(matrix,last[1:3]),last[7]*self.T()])
+        ray_state_2 = self.full_reflection()
+        ray_state_2[-1] = ray_state_2[-1]*self.R()
+        ray_state = np.vstack([ray_state_1,ray_state_2])
+        if self.polarized == True:
+            R_s,R_p = self.reflectance(self.slope2rad(last[2]))
+            polarization = np.vstack([last[8]*(1-R_s),last[9]*(1-R_p),last[8]*R_s,last[9]*R_p])
+            ray_state = np.vstack([ray_state,polarization])
+        self.state.append(ray_state)
+        return ray_state
+    
+    def flat_interface(self):
+        return self.interface(self.flat_matrix())
+    
+    def curved_interface(self,r):
+        ray_state = self.interface(self.curved_matrix(r))
+        # move the rays onto the curved surface
+        theta = self.slope2rad(ray_state[2])
+        y = ray_state[1]
+        m = y*np.cos(theta)+np.sqrt(y*y*np.cos(theta)**2 - (y**2-r**2))
+        x = m*np.sin(theta)
+        y = m*np.sin(np.pi/2 - theta)
+        ray_state[0] -= x
+        ray_state[1] -= y
+        ray_state[4] -= x
+        ray_state[5] -= y
+        return ray_state
+    
+    def multi_surface(self,surfaces):
+        '''
+        multi_surface(self,surfaces)
+            Pass the bundle through a train of surfaces, e.g. a thick lens or
+            a doublet, and append only the state behind the last surface.
+            Every surface is the same as curved_interface (flat_interface for
+            r = np.inf) with n_1 and n_2 set to the indices on both sides,
+            followed by free_propagate over the thickness, so the result is
+            the same as building the chain by hand, including the hit point
+            shifts and the R()/T() intensities. The reflected ray is the one
+            of the last surface.
+            The hit point shift depends on the rays, so the surfaces can not
+            be combined into one ABCD matrix: multi_surface costs as much as
+            the chain built by hand, it only keeps a single state.
+            
+        Parameters
+        ------------
+        surfaces: tuple
+            ((r, thickness, index), ...), the rays cross a surface of radius r
+            (np.inf for a flat one) into a medium of index and travel thickness
+            in it. The index after the last surface should normally be self.n_1.
+        '''
+        n_1,n_2 = self.n_1,self.n_2
+        start = len(self.state)
+        n = n_1
+        try:
+            for r,thickness,index in surfaces:
+                self.n_1,self.n_2 = n,index
+                if np.isinf(r):
+                    self.flat_interface()
+                else:
+                    self.curved_interface(r)
+                if thickness != 0:
+                    self.free_propagate(thickness)
+                n = index
+        finally:
+            self.n_1,self.n_2 = n_1,n_2
+        ray_state = self.state[-1]
+        del self.state[start:]
+        self.state.append(ray_state)
+        return ray_state
+    
+    def thick_lens(self,r_1,thickness,r_2):
+        '''
+        thick_lens(self,r_1,thickness,r_2)
+            Thick lens of index self.n_2 in a medium of index self.n_1, with
+            front radius r_1 and back radius r_2 (np.inf for flat). The same
+            as curved_interface(r_1), free_propagate(thickness) and
+            curved_interface(r_2) with n_1 and n_2 swapped.
+        '''
+        return self.multi_surface(((r_1,thickness,self.n_2),(r_2,0,self.n_1)))
+    
+    def bundle(self):
+        '''
+        bundle(self)
+            Returns the states ray by ray, in the same layout as a list of
+            RayTracing.state, so it can be plotted or tabulated in the same way.
+        '''
+        return [[ray_state[:,i] for ray_state in self.state] for i in range(len(self.y))]
+
+
+class OpticalTrain:
+    
+    elements = ('free_propagate','lens','mirror','flat_interface','curved_interface',
+                'thick_lens','multi_surface')
+
+    def __init__(self,x,y,theta):
+        '''
+        __init__ (self,x,y,theta)
+            Gives the initial state of the bundle which passes the train.
+            
+        Parameters
+        ------------
+        self.x, self.y, self.theta: float or array
+            Initial state of the rays, as for BundleTracing.
+        self.train: list
+            The optical equipments in order, each one is [name, parameters].
+        self.state: list
+            Checkpoints of the bundle state, self.state[i] is the state
+            before the i-th equipment.
+        self.M: list
+            The mirror flag of the bundle at every checkpoint.
+        self.Gauss, self.polarized, self.s_fraction, self.tolerance,
+        self.n_1, self.n_2:
+            Settings given to the BundleTracing, see there.
+        self.source: tuple
+            The initial rays and settings the checkpoints were traced with.
+        '''
+        self.x = x
+        self.y = y
+        self.theta = theta
+        self.Gauss = True
+        self.polarized = False
+        self.s_fraction = 0.5
+        self.tolerance = None
+        self.n_1 = 1
+        self.n_2 = 1.5
+        self.train = []
+        self.state = []
+        self.M = []
+        self.source = None
+        
+    def add(self,name,*parameters):
+        '''
+        add(self,name,*parameters)
+            Append an optical equipment at the end of the train, e.g.
+            add('lens',15). Returns the index of the equipment.
+        '''
+        if name not in self.elements:
+            raise ValueError('unknown optical equipment: %s' % name)
+        self.train.append([name,parameters])
+        return len(self.train)-1
+    
+    def change(self,index,*parameters):
+        '''
+        change(self,index,*parameters)
+            Change the parameters of the index-th equipment. The checkpoints
+            after it are dropped, the ones before it are kept.
+        '''
+        self.train[index][1] = parameters
+        self.invalidate(index)
+        
+    def invalidate(self,index=-1):
+        '''
+        invalidate(self,index)
+            Drop the checkpoints after the state before the index-th equipment.
+            invalidate() drops all of them including the initial state, trace
+            does that by itself when self.x, self.y, self.theta or any of the
+            settings changed.
+        '''
+        del self.state[index+1:]
+        del self.M[index+1:]
+        
+    def trace(self):
+        '''
+        trace(self)
+            Trace the bundle through the train. Only the equipments after the
+            last valid checkpoint are evaluated. Returns the BundleTracing.
+            Its states are the checkpoints themselves and read-only, copy a
+            state before changing it.
+        '''
+        source = self.settings()
+        if self.source is None or not self.same(self.source,source):
+            self.invalidate()
+            self.source = source
+        BT = BundleTracing(self.x,self.y,self.theta)
+        BT.Gauss = self.Gauss
+        BT.polarized = self.polarized
+        BT.s_fraction = self.s_fraction
+        BT.tolerance = self.tolerance
+        BT.n_1 = self.n_1
+        BT.n_2 = self.n_2
+        if len(self.state) == 0:
+            BT.ray()
+            self.checkpoint(BT)
+        BT.state = list(self.state)
+        BT.M = self.M[-1]
+        for name,parameters in self.train[len(self.state)-1:]:
+            getattr(BT,name)(*parameters)
+            self.checkpoint(BT)
+        return BT
+    
+    def settings(self):
+        '''
+        settings(self)
+            Everything the checkpoints depend on besides the train, with
+            copies of the initial state of the rays.
+        '''
+        rays = tuple(np.array(value,dtype=float) for value in (self.x,self.y,self.theta))
+        return rays,(self.Gauss,self.polarized,self.s_fraction,self.tolerance,self.n_1,self.n_2)
+    
+    def same(self,old,new):
+        return old[1] == new[1] and all(a.shape == b.shape and np.array_equal(a,b) for a,b in zip(old[0],new[0]))
+    
+    def checkpoint(self,BT):
+        '''
+        checkpoint(self,BT)
+            Keep the last state of BT, made read-only so it can not be
+            changed by accident through a returned BundleTracing.
+        '''
+        BT.state[-1].flags.writeable = False
+        self.state.append(BT.state[-1])
+        self.M.append(BT.M)
+
+
+class PrismBundleTracing(PrismTracing):
+
+    def __init__(self,x,z,theta):
+        '''
+        __init__ (self,x,z,theta)
+            Gives the initial state of all rays in the bundle. Unlike
+            BundleTracing there is no tolerance: prism needs the sines of the
+            incident angles for the refraction anyway, and the reflectances
+            follow from them faster than from a FresnelTable lookup.
+            
+        Parameters
+        ------------
+        self.x, self.z, self.theta: float or array
+            Initial state of the rays, as for PrismTracing.
+        self.state: list
+            Every state is an array of shape (3, number of rays), or
+            (5, number of rays) if self.polarized is True.
+        self.polarized: bool
+            If True, rows 3 and 4 are the s and p intensity transmitted
+            through the faces of the prism. All faces share the plane of
+            incidence, so s and p do not mix.
+        self.s_fraction: float
+            Part of the initial intensity which is s polarized.
+        '''
+        x,z,theta = np.broadcast_arrays(*np.atleast_1d(x,z,theta))
+        PrismTracing.__init__(self,x.astype(float),z.astype(float),theta.astype(float))
+        self.polarized = False
+        self.s_fraction = 0.5
+        
+    def ray(self):
+        '''
+        ray(self)
+            Append the initial state of the bundle into the total ray state.
+        '''
+        ray_state = np.vstack([self.x,self.z,self.theta])
+        if self.polarized == True:
+            ray_state = np.vstack([ray_state,np.full_like(self.x,self.s_fraction),np.full_like(self.x,1-self.s_fraction)])
+        self.state.append(ray_state)
+        
+    def face(self,slope,intercept,sin_i,theta,n_1,n_2):
+        '''
+        face(self,slope,intercept,sin_i,theta,n_1,n_2)
+            Append the state of the bundle after the face z = slope*x + intercept,
+            the new angle of the rays is theta. The rays go from index n_1 into
+            n_2, sin_i is the sine of the incident angle as computed by prism
+            for the refraction.
+        '''
+        last = self.state[-1]
+        incident_slope = np.tan(np.deg2rad(last[2]))
+        offset = last[1]-incident_slope*last[0]
+        x = (offset-intercept)/(slope-incident_slope)
+        rows = [x,offset+incident_slope*x,theta]
+        if self.polarized == True:
+            T_s,T_p = transmittance(n_1,n_2,np.sqrt(1-sin_i**2),n_1/n_2*sin_i)
+            rows += [last[3]*T_s,last[4]*T_p]
+        ray_state = np.vstack(rows)
+        self.state.append(ray_state)
+        return ray_state
+        
+    def refraction(self,sin_i,n_1,n_2):
+        '''
+        refraction(self,sin_i,n_1,n_2)
+            Snell's law from index n_1 into n_2, returns the refraction angle
+            in degree for the sine of the incident angle sin_i.
+        '''
+        return np.rad2deg(np.arcsin(n_1/n_2 * sin_i))
+    
+    def prism(self,side_length,central_point):
+        '''
+        prism(self,side_length,central_point)
+            Simulate the behavior of prism for the whole bundle, same as
+            PrismTracing.prism.
+        '''
+        self.central_point = central_point
+        self.side_length = side_length
+        with np.errstate(invalid='ignore'):
+            incident_angle_1 = 30 + self.state[-1][2]
+            sin_i_1 = np.sin(np.deg2rad(incident_angle_1))
+            out_angle_1 = self.refraction(sin_i_1,self.n_air,self.n_glass)
+            self.face(math.sqrt(3),-math.sqrt(3)*self.central_point+self.side_length/math.sqrt(3),
+                      sin_i_1,out_angle_1-30,self.n_air,self.n_glass)
+            incident_angle_2 = 60- out_angle_1
+            sin_i_2 = np.sin(np.deg2rad(incident_angle_2))
+            out_angle_2 = self.refraction(sin_i_2,self.n_glass,self.n_air)
+            self.face(-math.sqrt(3),math.sqrt(3)*self.central_point+self.side_length/math.sqrt(3),
+                      sin_i_2,30-out_angle_2,self.n_glass,self.n_air)
+
+
+class PositionBundleTracing:
+
+    def __init__(self,x,z,theta):
+        '''
+        __init__ (self,x,z,theta)
+            Vectorized version of RayTracing in mirror and convex.py, where the
+            lens and the mirror are given by their x position. Every state is
+            an array of shape (3, number of rays) with x, z and the angle
+            (in degree).
+        '''
+        x,z,theta = np.broadcast_arrays(*np.atleast_1d(x,z,theta))
+        self.x = x.astype(float)
+        self.z = z.astype(float)
+        self.theta = theta.astype(float)
+        self.state = []
+        
+    def ray(self):
+        self.state.append(np.vstack([self.x,self.z,self.theta]))
+        
+    def lens(self,focal_length,position):
+        '''
+        lens(self,focal_length,position)
+            Simulate the lens at position for the whole bundle, same as
+            RayTracing.lens in mirror and convex.py.
+        '''
+        last = self.state[-1]
+        slope = (last[2]/180)*math.pi
+        u = position
+        f = focal_length
+        hit_point = np.vstack([np.full_like(last[1],u),slope*u + last[1]])
+        if u == f:
+            output_slope = -last[1]/f
+        else:
+            v = u*f/(u-f)
+            x = v + u
+            y = -last[1]/u * x + last[1]
+            output_slope = (y-hit_point[1])/(x-hit_point[0])
+        output_angle = np.arctan(output_slope)/math.pi * 180
+        ray_state = np.vstack([hit_point,output_angle])
+        self.state.append(ray_state)
+        
+    def plane_mirror(self,position):
+        '''
+        plane_mirror(self,position)
+            Simulate the mirror at position for the whole bundle, same as
+            RayTracing.plane_mirror in mirror and convex.py.
+        '''
+        slope = (self.theta/180)*math.pi
+        vertical_dis = np.tan(slope)*(position-self.x)
+        ray_state = np.vstack([position+self.x,vertical_dis+self.z,180-self.theta])
+        self.state.append(ray_state)
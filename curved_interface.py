@@ -13,12 +13,7 @@ Created on Thu Jun 18 16:42:19 2020
 """
 
 import numpy as np
-import matplotlib.pyplot as plt
 import math
-import pandas as pd
-
-pd.set_option('display.max_columns', None)
-pd.set_option('display.max_rows', None)
 
 class RayTracing:
 
@@ -180,6 +175,7 @@ if __name__=='__main__':
         plot_ray(self)
             Plot the ray path which is described in self.state.
         '''
+        import matplotlib.pyplot as plt
         Ray_thickness = 15
         
         for j in range(len(rays)):
@@ -206,6 +202,9 @@ if __name__=='__main__':
         plt.show()
         
     def make_table(n):
+        import pandas as pd
+        pd.set_option('display.max_columns', None)
+        pd.set_option('display.max_rows', None)
         for i in range(n):            
             data = bundle(n)[i]
             df = pd.DataFrame(data,columns=list('ABCDEFGH'))
@@ -1,10 +1,19 @@
-import raytracing.thorlabs as thorlabs
-from .imagingpath import *
-import raytracing.eo as eo
-import raytracing.olympus as olympus
-path = ImagingPath()
-path.label = "Demo #1: lens f = 5cm, infinite diameter"
-path.append(Space(d=10))
-path.append(Lens(f=5))
-path.append(Space(d=10))
-path.display()
\ No newline at end of file
+# -*- coding: utf-8 -*-
+"""
+Demo of the external raytracing package.
+
+The package is only imported when demo() is called, importing this file has
+no side effects.
+"""
+
+def demo():
+    from raytracing import ImagingPath, Space, Lens
+    path = ImagingPath()
+    path.label = "Demo #1: lens f = 5cm, infinite diameter"
+    path.append(Space(d=10))
+    path.append(Lens(f=5))
+    path.append(Space(d=10))
+    path.display()
+
+if __name__=='__main__':
+    demo()
@@ -9,7 +9,6 @@ path.
 @author: Benchi Zhao
 """
 import numpy as np
-import matplotlib.pyplot as plt
 import math
 
 class RayTracing:
@@ -98,6 +97,7 @@ class RayTracing:
         plot_ray(self)
             Plot the ray path which is described in self.state.
         '''
+        import matplotlib.pyplot as plt
         for i in range(len(self.state)):
             slope = self.state[i][2]/180 * math.pi
             if i < len(self.state)-1:             
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+This .py file is a Monte Carlo source for BundleTracing. Instead of spreading
+the rays uniformly with np.linspace and weighting them with a gaussian, the
+start heights are drawn from the gaussian (or any other) distribution itself,
+so every ray carries the same intensity.
+
+The heights can be drawn randomly, stratified, or from the quasi-random Halton
+sequence. MonteCarloSource.irradiance splits the source into strata and keeps
+sending more rays into the strata whose detector irradiance has the highest
+variance, until the requested noise level is reached.
+
+This file only needs numpy.
+"""
+
+import numpy as np
+from bundle_tracer import BundleTracing, gaussian
+
+def halton(n,base=2,start=0):
+    '''
+    halton(n,base,start)
+        Returns n numbers of the Halton (van der Corput) sequence in [0,1),
+        starting from the start-th number.
+    '''
+    index = np.arange(start+1,start+n+1)
+    result = np.zeros(n)
+    fraction = 1.0
+    while np.any(index > 0):
+        fraction = fraction/base
+        result += fraction*(index % base)
+        index = index//base
+    return result
+
+
+class MonteCarloSource:
+
+    def __init__(self,width=2,density=None,method='stratified',x=0,theta=0,seed=None):
+        '''
+        __init__ (self,width,density,method,x,theta,seed)
+            Gives the source the rays are sampled from.
+            
+        Parameters
+        ------------
+        self.width: float
+            The rays start between -width and width.
+        self.density: function
+            Intensity of the source against the start height, the gaussian of
+            RayTracing if None.
+        self.method: str
+            'random', 'stratified' or 'halton'.
+        self.x: float
+            Initial x-position of the rays.
+        self.theta: float
+            The angle between the horizontal and the ray path.
+        self.power: float
+            Total intensity of the source between -width and width.
+        '''
+        self.width = width
+        self.density = density
+        self.method = method
+        self.x = x
+        self.theta = theta
+        self.rng = np.random.default_rng(seed)
+        self.index = 0
+        if self.method not in ('random','stratified','halton'):
+            raise ValueError('unknown sampling method: %s' % method)
+        # tabulate the inverse of the cumulative distribution
+        self.grid = np.linspace(-width,width,2001)
+        if density is None:
+            pdf = gaussian(self.grid)
+        else:
+            pdf = density(self.grid)
+        cdf = np.append(0,np.cumsum((pdf[1:]+pdf[:-1])/2*np.diff(self.grid)))
+        self.power = cdf[-1]
+        self.cdf = cdf/cdf[-1]
+    
+    def uniform(self,n,low=0,high=1):
+        '''
+        uniform(self,n,low,high)
+            Returns n numbers in [low,high) with the sampling method.
+        '''
+        if self.method == 'random':
+            u = self.rng.random(n)
+        elif self.method == 'stratified':
+            u = (np.arange(n)+self.rng.random(n))/n
+        else:
+            u = halton(n,start=self.index)
+            self.index += n
+        return low + (high-low)*u
+    
+    def heights(self,u):
+        '''
+        heights(self,u)
+            Transform numbers in [0,1) into start heights distributed as the source.
+        '''
+        return np.interp(u,self.cdf,self.grid)
+    
+    def bundle(self,n):
+        '''
+        bundle(self,n)
+            Returns a BundleTracing of n rays sampled from the source, after
+            ray() is called. Every ray carries power/n of the intensity.
+        '''
+        BT = BundleTracing(self.x,self.heights(self.uniform(n)),self.theta)
+        BT.Gauss = False
+        BT.ray()
+        BT.state[-1][[3,7]] *= self.power/n
+        return BT
+    
+    def irradiance(self,train,detector,bins=50,target=0.01,rays=1000,strata=16,max_rays=10**6):
+        '''
+        irradiance(self,train,detector,bins,target,rays,strata,max_rays)
+            Estimate the irradiance of the transmitted rays at the end of the
+            train, adding rays where the variance is highest until the
+            relative standard error is below target.
+            
+        Parameters
+        ------------
+        train: list
+            The optical equipments, [name, parameters] as in OpticalTrain.train.
+        detector: tuple
+            (lowest, highest) y-position covered by the detector.
+        bins: int
+            Number of detector pixels.
+        target: float
+            Wanted standard error relative to the irradiance (root mean square
+            over the pixels).
+        rays: int
+            Number of rays traced in every iteration.
+        strata: int
+            Number of equal probability strata the source is split into.
+        max_rays: int
+            Stop when so many rays have been traced.
+        
+        Returns
+        ------------
+        edges, irradiance, error, number of traced rays
+        '''
+        edges = np.linspace(detector[0],detector[1],bins+1)
+        n = np.zeros(strata)
+        S1 = np.zeros((strata,bins))
+        S2 = np.zeros((strata,bins))
+        # every stratum starts with the same share of the first rays
+        m = np.full(strata,max(rays//strata,2))
+        while True:
+            k = np.repeat(np.arange(strata),m)
+            u = np.concatenate([self.uniform(m[i],i/strata,(i+1)/strata) for i in range(strata)])
+            BT = BundleTracing(self.x,self.heights(u),self.theta)
+            BT.Gauss = False
+            BT.ray()
+            for name,parameters in train:
+                getattr(BT,name)(*parameters)
+            y = BT.state[-1][1]
+            value = self.power*BT.state[-1][3]
+            pixel = np.searchsorted(edges,y,side='right')-1
+            hit = (pixel >= 0) & (pixel < bins) & np.isfinite(value)
+            n += m
+            np.add.at(S1,(k[hit],pixel[hit]),value[hit])
+            np.add.at(S2,(k[hit],pixel[hit]),value[hit]**2)
+            
+            p = 1/strata
+            mean = S1/n[:,None]
+            variance = np.maximum(S2/n[:,None]-mean**2,0)*n[:,None]/(n[:,None]-1)
+            result = p*mean.sum(axis=0)
+            error = np.sqrt((p**2*variance/n[:,None]).sum(axis=0))
+            total = np.sqrt(np.sum(result**2))
+            if total == 0 or np.sqrt(np.sum(error**2)) <= target*total or n.sum() >= max_rays:
+                break
+            # Neyman allocation, more rays where the standard deviation is larger
+            sigma = np.sqrt(variance.sum(axis=1))
+            if sigma.sum() == 0:
+                share = np.full(strata,1/strata)
+            else:
+                share = sigma/sigma.sum()
+            # largest remainder rounding, so the rays left are all handed out
+            budget = int(min(rays,max_rays-n.sum()))
+            quota = share*budget
+            m = np.floor(quota).astype(int)
+            m[np.argsort(m-quota)[:budget-m.sum()]] += 1
+            if m.sum() == 0:
+                break
+        return edges,result/np.diff(edges),error/np.diff(edges),int(n.sum())
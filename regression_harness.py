@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+"""
+This .py file checks that the batched tracers give the same rays as the
+reference tracers, ray by ray:
+
+    RayTracing (ABCD_ray_tracer.py)             -> BundleTracing
+    PrismTracing (Prism_RayTracing.py)          -> PrismBundleTracing
+    PrismTracing (Prism_with_full_reflection.py)-> PrismBundleTracing
+    RayTracing (mirror and convex.py)           -> PositionBundleTracing
+    RayTracing chain of two curved_interface    -> BundleTracing.thick_lens
+
+For every element type random systems and bundles are generated, traced with
+both, and the largest absolute difference of the states and the speedup are
+reported. Rays which are lost (nan) in one tracer must be lost in the other,
+otherwise the error is inf. The '(table)' checks use the lookup tables of
+FresnelTable, their error should stay around the tolerance. The incremental retrace of OpticalTrain is compared with a
+full retrace, and the polarized mode with the unpolarized one. The s and p
+rows of the polarized mode must conserve the intensity at an interface and
+follow (1-R)**2 through a flat slab.
+
+Every check has a threshold for the error. Run it with
+python regression_harness.py, it exits with 1 if a check fails.
+"""
+
+import os
+import sys
+import time
+import importlib.util
+import numpy as np
+import ABCD_ray_tracer
+import Prism_RayTracing
+import Prism_with_full_reflection
+from bundle_tracer import BundleTracing, PrismBundleTracing, PositionBundleTracing, OpticalTrain
+from bundle_tracer import fresnel, fresnel_lookup, TOLERANCE
+
+def load_mirror_and_convex():
+    '''
+    load_mirror_and_convex()
+        mirror and convex.py can not be imported by name because of the spaces.
+    '''
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)),'mirror and convex.py')
+    spec = importlib.util.spec_from_file_location('mirror_and_convex',path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+mirror_and_convex = load_mirror_and_convex()
+
+def max_error(reference,fast):
+    '''
+    max_error(reference,fast)
+        Largest absolute difference of two arrays, inf if they lose
+        different rays.
+    '''
+    reference = np.asarray(reference,dtype=float)
+    fast = np.asarray(fast,dtype=float)
+    if reference.shape != fast.shape or np.any(np.isnan(reference) != np.isnan(fast)):
+        return np.inf
+    if np.all(np.isnan(reference)):
+        return 0.0
+    return np.nanmax(abs(reference-fast))
+
+def random_system(element,rng):
+    '''
+    random_system(element,rng)
+        A list of [name, parameters] for RayTracing with element between two
+        free propagations.
+    '''
+    parameters = {'free_propagate':(rng.uniform(1,20),),
+                  'lens':(rng.choice([-1,1])*rng.uniform(5,30),),
+                  'mirror':(),
+                  'flat_interface':(),
+                  'curved_interface':(rng.uniform(3,10),)}[element]
+    return [['free_propagate',(rng.uniform(1,20),)],[element,parameters],['free_propagate',(rng.uniform(1,20),)]]
+
+def compare_ray_tracing(element,rays,rng,tolerance=None):
+    system = random_system(element,rng)
+    y = rng.uniform(-2,2,rays)
+    theta = rng.uniform(-0.1,0.1,rays)
+    start = time.perf_counter()
+    reference = []
+    for i in range(rays):
+        RT = ABCD_ray_tracer.RayTracing(0,y[i],theta[i])
+        RT.ray()
+        for name,parameters in system:
+            getattr(RT,name)(*parameters)
+        reference.append(RT.state)
+    middle = time.perf_counter()
+    BT = BundleTracing(0,y,theta)
+    BT.tolerance = tolerance
+    BT.ray()
+    for name,parameters in system:
+        getattr(BT,name)(*parameters)
+    end = time.perf_counter()
+    return max_error(reference,BT.bundle()),middle-start,end-middle
+
+def compare_prism(module,rays,rng):
+    side_length = rng.uniform(3,6)
+    central_point = rng.uniform(4,8)
+    z = rng.uniform(-1,1,rays)
+    theta = rng.uniform(-1,20,rays)
+    start = time.perf_counter()
+    reference = []
+    with np.errstate(invalid='ignore'):
+        for i in range(rays):
+            PT = module.PrismTracing(0,z[i],theta[i])
+            PT.ray()
+            PT.prism(side_length,central_point)
+            reference.append(PT.state)
+    middle = time.perf_counter()
+    PB = PrismBundleTracing(0,z,theta)
+    PB.ray()
+    PB.prism(side_length,central_point)
+    end = time.perf_counter()
+    # Prism_with_full_reflection stops after the first face
+    steps = len(reference[0])
+    fast = [[state[:,i] for state in PB.state[:steps]] for i in range(rays)]
+    return max_error(reference,fast),middle-start,end-middle
+
+def compare_position(element,rays,rng):
+    z = rng.uniform(-3,3,rays)
+    theta = rng.uniform(-10,10,rays)
+    if element == 'positional lens':
+        parameters = (rng.choice([-1,1])*rng.uniform(5,15),rng.uniform(16,30))
+        name = 'lens'
+    else:
+        parameters = (rng.uniform(5,30),)
+        name = 'plane_mirror'
+    start = time.perf_counter()
+    reference = []
+    for i in range(rays):
+        RT = mirror_and_convex.RayTracing(0,z[i],theta[i])
+        RT.ray()
+        getattr(RT,name)(*parameters)
+        reference.append(RT.state)
+    middle = time.perf_counter()
+    PB = PositionBundleTracing(0,z,theta)
+    PB.ray()
+    getattr(PB,name)(*parameters)
+    end = time.perf_counter()
+    fast = [[state[:,i] for state in PB.state] for i in range(rays)]
+    return max_error(reference,fast),middle-start,end-middle
+
+def compare_thick_lens(rays,rng,tolerance=None):
+    '''
+    compare_thick_lens(rays,rng,tolerance)
+        BundleTracing.thick_lens against the chain built by hand from
+        RayTracing: curved_interface, free_propagate and curved_interface
+        with n_1 and n_2 swapped. Only the last state is compared, as
+        thick_lens does not keep the states inside the lens.
+    '''
+    r_1 = rng.uniform(5,15)
+    r_2 = -rng.uniform(5,15)
+    thickness = rng.uniform(0.5,3)
+    distance = rng.uniform(1,20)
+    y = rng.uniform(-2,2,rays)
+    theta = rng.uniform(-0.1,0.1,rays)
+    start = time.perf_counter()
+    reference = []
+    with np.errstate(invalid='ignore'):
+        for i in range(rays):
+            RT = ABCD_ray_tracer.RayTracing(0,y[i],theta[i])
+            RT.ray()
+            RT.free_propagate(distance)
+            RT.curved_interface(r_1)
+            RT.free_propagate(thickness)
+            RT.n_1,RT.n_2 = RT.n_2,RT.n_1
+            RT.curved_interface(r_2)
+            reference.append(RT.state[-1])
+        middle = time.perf_counter()
+        BT = BundleTracing(0,y,theta)
+        BT.tolerance = tolerance
+        BT.ray()
+        BT.free_propagate(distance)
+        BT.thick_lens(r_1,thickness,r_2)
+        end = time.perf_counter()
+    return max_error(reference,BT.state[-1].T),middle-start,end-middle
+
+def compare_incremental(rays,rng):
+    '''
+    compare_incremental(rays,rng)
+        Change one equipment of a traced OpticalTrain and compare the
+        incremental retrace with tracing a new train from the start.
+    '''
+    elements = ('free_propagate','lens','flat_interface','curved_interface','mirror')
+    system = []
+    for i in range(3):
+        system += random_system(elements[rng.integers(len(elements))],rng)
+    y = rng.uniform(-2,2,rays)
+    theta = rng.uniform(-0.1,0.1,rays)
+    index = rng.integers(len(system))
+    name,parameters = system[index]
+    if name == 'free_propagate':
+        parameters = (rng.uniform(1,20),)
+    elif name == 'lens':
+        parameters = (rng.choice([-1,1])*rng.uniform(5,30),)
+    elif name == 'curved_interface':
+        parameters = (rng.uniform(3,10),)
+    with np.errstate(invalid='ignore'):
+        incremental = OpticalTrain(0,y,theta)
+        for element in system:
+            incremental.add(element[0],*element[1])
+        incremental.trace()
+        start = time.perf_counter()
+        full = OpticalTrain(0,y,theta)
+        for element in system:
+            full.add(element[0],*element[1])
+        full.change(index,*parameters)
+        full = full.trace()
+        middle = time.perf_counter()
+        incremental.change(index,*parameters)
+        incremental = incremental.trace()
+        end = time.perf_counter()
+    return max_error(full.state,incremental.state),middle-start,end-middle
+
+def compare_polarized(element,rays,rng):
+    '''
+    compare_polarized(element,rays,rng)
+        The polarized mode only adds the s and p rows, the first 8 rows must
+        be the same as without it. The speedup is the unpolarized time over
+        the polarized time.
+    '''
+    system = random_system(element,rng)
+    y = rng.uniform(-2,2,rays)
+    theta = rng.uniform(-0.1,0.1,rays)
+    result = []
+    for polarized in (False,True):
+        start = time.perf_counter()
+        BT = BundleTracing(0,y,theta)
+        BT.polarized = polarized
+        BT.ray()
+        for name,parameters in system:
+            getattr(BT,name)(*parameters)
+        result.append((np.array(BT.state)[:,:8],time.perf_counter()-start))
+    return max_error(result[0][0],result[1][0]),result[0][1],result[1][1]
+
+def compare_energy(element,rays,rng):
+    '''
+    compare_energy(element,rays,rng)
+        At a single interface the transmitted and the reflected s and p
+        intensities (rows 8 to 11) must add up to the incoming intensity,
+        also under total reflection. The speedup is the unpolarized time
+        over the polarized time.
+    '''
+    n_1,n_2 = (1,1.5) if rng.random() < 0.5 else (1.5,1)
+    parameters = {'flat_interface':(),'curved_interface':(rng.uniform(3,10),)}[element]
+    y = rng.uniform(-2,2,rays)
+    theta = rng.uniform(-2,2,rays)
+    result = []
+    for polarized in (False,True):
+        start = time.perf_counter()
+        BT = BundleTracing(0,y,theta)
+        BT.polarized = polarized
+        BT.n_1,BT.n_2 = n_1,n_2
+        BT.ray()
+        # the intensity rows of RayTracing.R are nan under total reflection
+        with np.errstate(invalid='ignore'):
+            getattr(BT,element)(*parameters)
+        result.append((BT.state,time.perf_counter()-start))
+    first,last = result[1][0][0],result[1][0][-1]
+    return max_error(first[8]+first[9],last[8:12].sum(axis=0)),result[0][1],result[1][1]
+
+def compare_slab(rays,rng):
+    '''
+    compare_slab(rays,rng)
+        Through a flat slab the transmitted s and p intensities must be
+        (1-R_s)**2 and (1-R_p)**2 of the incoming ones, with the reflectance
+        of fresnel() at the first face. The paraxial refraction angle of
+        flat_interface differs slightly from Snell's law, so the check is
+        approximate. The speedup is the unpolarized time over the polarized
+        time.
+    '''
+    n_glass = rng.uniform(1.3,1.8)
+    thickness = rng.uniform(1,10)
+    y = rng.uniform(-2,2,rays)
+    theta = rng.uniform(-0.1,0.1,rays)
+    result = []
+    for polarized in (False,True):
+        start = time.perf_counter()
+        BT = BundleTracing(0,y,theta)
+        BT.polarized = polarized
+        BT.n_1,BT.n_2 = 1,n_glass
+        BT.ray()
+        BT.flat_interface()
+        BT.free_propagate(thickness)
+        BT.n_1,BT.n_2 = n_glass,1
+        BT.flat_interface()
+        result.append((BT.state,time.perf_counter()-start))
+    first,last = result[1][0][0],result[1][0][-1]
+    R_s,R_p = fresnel(1,n_glass,BT.slope2rad(theta))
+    expected = np.vstack([first[8]*(1-R_s)**2,first[9]*(1-R_p)**2])
+    return max_error(expected,last[8:10]),result[0][1],result[1][1]
+
+def run(rays=500,trials=5,seed=0,tolerance=TOLERANCE):
+    '''
+    run(rays,trials,seed,tolerance)
+        Compare every element type in trials random systems of rays rays.
+        The '(table)' checks use the FresnelTable with tolerance, the tables
+        are made before the timing starts.
+        Returns a dict of element type: (max error, speedup, threshold).
+    '''
+    rng = np.random.default_rng(seed)
+    exact = 1e-9
+    checks = {}
+    for element in ('free_propagate','lens','mirror','flat_interface','curved_interface'):
+        checks[element] = (exact,lambda element=element: compare_ray_tracing(element,rays,rng))
+    checks['prism'] = (exact,lambda: compare_prism(Prism_RayTracing,rays,rng))
+    checks['prism (full reflection)'] = (exact,lambda: compare_prism(Prism_with_full_reflection,rays,rng))
+    checks['positional lens'] = (exact,lambda: compare_position('positional lens',rays,rng))
+    checks['plane_mirror'] = (exact,lambda: compare_position('plane_mirror',rays,rng))
+    checks['thick_lens'] = (exact,lambda: compare_thick_lens(rays,rng))
+    checks['OpticalTrain (incremental)'] = (exact,lambda: compare_incremental(rays,rng))
+    for element in ('flat_interface','curved_interface'):
+        checks[element+' (polarized)'] = (exact,lambda element=element: compare_polarized(element,rays,rng))
+        checks[element+' (energy)'] = (exact,lambda element=element: compare_energy(element,rays,rng))
+    checks['slab (polarized)'] = (1e-4,lambda: compare_slab(rays,rng))
+    BT = BundleTracing(0,0,0)
+    fresnel_lookup(BT.n_1,BT.n_2,tolerance)
+    fresnel_lookup(BT.n_2,BT.n_1,tolerance)
+    for element in ('flat_interface','curved_interface'):
+        checks[element+' (table)'] = (10*tolerance,lambda element=element: compare_ray_tracing(element,rays,rng,tolerance))
+    checks['thick_lens (table)'] = (10*tolerance,lambda: compare_thick_lens(rays,rng,tolerance))
+    
+    report = {}
+    for element,(threshold,check) in checks.items():
+        error,reference_time,fast_time = 0.0,0.0,0.0
+        for i in range(trials):
+            e,r,f = check()
+            error = max(error,e)
+            reference_time += r
+            fast_time += f
+        report[element] = (error,reference_time/fast_time,threshold)
+    return report
+
+if __name__=='__main__':
+    report = run()
+    print('%-28s %12s %10s %10s' % ('element','max error','threshold','speedup'))
+    failed = 0
+    for element,(error,speedup,threshold) in report.items():
+        result = 'ok' if error <= threshold else 'FAIL'
+        failed += result == 'FAIL'
+        print('%-28s %12.3g %10.0e %9.1fx %s' % (element,error,threshold,speedup,result))
+    if failed:
+        print('%d checks failed' % failed)
+        sys.exit(1)
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+This .py file is an asyncio service for many small trace requests. Requests
+for the same optical system which arrive within a short window are put into
+one bundle, traced at once with BundleTracing or PrismBundleTracing in a
+process pool, and every request gets back its own slice of the states.
+
+An optical system is a list of [name, parameters] as OpticalTrain.train,
+e.g. [['free_propagate',(20,)],['lens',(15,)]], or [['prism',(4,6)]] for
+the prism.
+
+    async with TraceService() as service:
+        state = await service.trace(system,0,heights,0)
+
+This file only needs numpy.
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from bundle_tracer import BundleTracing, PrismBundleTracing, OpticalTrain
+
+def trace_batch(system,x,y,theta,Gauss=True,polarized=False):
+    '''
+    trace_batch(system,x,y,theta,Gauss,polarized)
+        Trace one bundle through system. Returns all states as one array of
+        shape (number of states, rows, number of rays).
+    '''
+    if system and system[0][0] == 'prism':
+        BT = PrismBundleTracing(x,y,theta)
+    else:
+        BT = BundleTracing(x,y,theta)
+        BT.Gauss = Gauss
+    BT.polarized = polarized
+    BT.ray()
+    for name,parameters in system:
+        getattr(BT,name)(*parameters)
+    return np.array(BT.state)
+
+def freeze(parameters):
+    '''
+    freeze(parameters)
+        Turn the lists and arrays in parameters into tuples, at every level,
+        so the parameters can be part of a dict key.
+    '''
+    if isinstance(parameters,(list,tuple,np.ndarray)):
+        return tuple(freeze(parameter) for parameter in parameters)
+    try:
+        hash(parameters)
+    except TypeError:
+        raise ValueError('parameters of an optical equipment must be hashable: %r' % (parameters,))
+    return parameters
+
+
+class TraceService:
+
+    def __init__(self,workers=None,window=0.002,max_rays=100000,executor=None):
+        '''
+        __init__ (self,workers,window,max_rays,executor)
+            
+        Parameters
+        ------------
+        workers: int
+            Number of processes of the pool, the number of CPUs if None.
+        window: float
+            Seconds a request waits for others of the same system to join.
+        max_rays: int
+            A batch is sent at once when it has so many rays. Batches only
+            get larger when a single request has more rays.
+        executor: Executor
+            Used instead of a new process pool if given.
+        '''
+        self.workers = workers
+        self.window = window
+        self.max_rays = max_rays
+        self.executor = executor
+        self.own_executor = executor is None
+        self.pending = {}
+        self.tasks = {}
+        self.running = set()
+        
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self,*exc):
+        await self.close()
+        
+    async def close(self):
+        '''
+        close(self)
+            Trace the waiting requests, wait for all batches in the pool and
+            shut the pool down without blocking the event loop.
+        '''
+        for key in list(self.pending):
+            self.flush(key,0)
+        await asyncio.gather(*self.running,return_exceptions=True)
+        if self.own_executor and self.executor is not None:
+            executor = self.executor
+            self.executor = None
+            await asyncio.get_running_loop().run_in_executor(None,executor.shutdown)
+    
+    def system(self,system):
+        '''
+        system(self,system)
+            Check the system and make it hashable, so requests can be grouped.
+        '''
+        system = tuple((name,freeze(parameters)) for name,parameters in system)
+        names = [name for name,parameters in system]
+        if 'prism' in names:
+            if names != ['prism']:
+                raise ValueError('a prism can not be combined with other optical equipments')
+        else:
+            for name in names:
+                if name not in OpticalTrain.elements:
+                    raise ValueError('unknown optical equipment: %s' % name)
+        return system
+        
+    async def trace(self,system,x,y,theta,Gauss=True,polarized=False):
+        '''
+        trace(self,system,x,y,theta,Gauss,polarized)
+            Trace a bundle through system. Returns the same array as
+            trace_batch for the rays of this request only.
+        '''
+        key = (self.system(system),Gauss,polarized)
+        x,y,theta = np.broadcast_arrays(*np.atleast_1d(x,y,theta))
+        future = asyncio.get_running_loop().create_future()
+        # a request which does not fit any more goes into the next batch
+        waiting = sum(len(request[1]) for request in self.pending.get(key,[]))
+        if waiting > 0 and waiting+len(y) > self.max_rays:
+            self.flush(key,0)
+            waiting = 0
+        self.pending.setdefault(key,[]).append((x,y,theta,future))
+        if waiting+len(y) >= self.max_rays:
+            self.flush(key,0)
+        elif key not in self.tasks:
+            self.flush(key,self.window)
+        return await future
+    
+    def flush(self,key,delay):
+        '''
+        flush(self,key,delay)
+            Send the requests waiting for key after delay seconds. With delay 0
+            they are taken out of self.pending at once, so later requests
+            start a new batch.
+        '''
+        timer = self.tasks.pop(key,None)
+        if timer is not None:
+            timer.cancel()
+        if delay > 0:
+            self.tasks[key] = asyncio.ensure_future(self.wait(key,delay))
+            return
+        requests = self.pending.pop(key,[])
+        if len(requests) == 0:
+            return
+        task = asyncio.ensure_future(self.run(key,requests))
+        self.running.add(task)
+        task.add_done_callback(self.running.discard)
+        
+    async def wait(self,key,delay):
+        await asyncio.sleep(delay)
+        del self.tasks[key]
+        self.flush(key,0)
+        
+    async def run(self,key,requests):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.workers)
+        system,Gauss,polarized = key
+        x,y,theta = [np.concatenate([request[i] for request in requests]) for i in range(3)]
+        try:
+            state = await asyncio.get_running_loop().run_in_executor(
+                self.executor,trace_batch,system,x,y,theta,Gauss,polarized)
+        except Exception as error:
+            for request in requests:
+                if not request[3].done():
+                    request[3].set_exception(error)
+            return
+        start = 0
+        for request in requests:
+            end = start+len(request[1])
+            if not request[3].done():
+                request[3].set_result(state[:,:,start:end])
+            start = end